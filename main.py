@@ -1,4 +1,5 @@
 import sys
+import time
 
 from PySide2.QtGui import *
 from PySide2.QtWidgets import *
@@ -17,14 +18,20 @@ class MainWindow(QMainWindow):
         size = QAction("Size",parent=self)
         size.triggered.connect(self.openSetSizeWindow)
         game.addAction(size)
+        savelog = QAction("Save log",parent=self)
+        savelog.triggered.connect(self.saveLog)
+        game.addAction(savelog)
 
         # Rubik's cube view
         self.size = 3
         self.cube = RubikGL(parent=self)
         self.cube.initCube(self.size)
+        self.cube.cubeSolved.connect(self.solved)
 
-        # Timer and move counter
-        self.timer = DigitalClock(parent=self)
+        # Timer and move counter, splits are taken with the space bar
+        self.timer = DigitalClock(self.cube.log, parent=self)
+        splitkey = QShortcut(QKeySequence(Qt.Key_Space), self)
+        splitkey.activated.connect(self.timer.split)
 
         # Control buttons
         undo     = QPushButton("Undo",     parent=self)
@@ -59,6 +66,11 @@ class MainWindow(QMainWindow):
         self.settings.sendSize.connect(self.setSize)
         self.settings.show()
 
+    def saveLog(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save log")
+        if path:
+            self.cube.log.save(path)
+
     @Slot(int)
     def setSize(self, size):
         self.cube.initCube(size)
@@ -81,7 +93,7 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def solved(self):
-        pass
+        self.timer.finishSolve(self.cube.cube.moves)
 
     def setLayers(self):
         pass
@@ -99,35 +111,86 @@ class MovesCounter(QLCDNumber):
 
 
 class DigitalClock(QLCDNumber):
-    def __init__(self, parent=None):
+    def __init__(self, log=None, parent=None):
         super(DigitalClock, self).__init__(parent)
 
         self.setSegmentStyle(QLCDNumber.Filled)
         self.setDigitCount(7)
         self.setMinimumSize(100,50)
 
-        self.time = QTime()
-        self.time.restart()
+        # Times come from a monotonic clock in nanoseconds, the Qt timer
+        # only repaints, once per screen refresh and only while visible
+        self.log = log
+        self.start = time.monotonic_ns()
+        self.stop = self.start
+        self.running = False
+        self.splits = []
+        self.shown = None
         self.timer = QTimer(self)
+        self.timer.timeout.connect(self.displayTime)
 
         self.displayTime()
 
+    def elapsed(self):
+        end = time.monotonic_ns() if self.running else self.stop
+        return end - self.start
+
     def stopTimer(self):
+        if self.running:
+            self.stop = time.monotonic_ns()
+            self.running = False
         self.timer.stop()
+        self.displayTime()
 
     def startTimer(self):
-        self.connect(self.timer, SIGNAL('timeout()'), self.displayTime)
-        self.time.start()
-        self.timer.start(10)
+        self.start = time.monotonic_ns()
+        self.running = True
+        self.splits = []
+        if self.log is not None:
+            self.log.annotate('start')
+        if self.isVisible():
+            self.timer.start(self._frameInterval())
 
     def resetTime(self):
-        self.time.restart()
+        self.start = self.stop = time.monotonic_ns()
         self.displayTime()
 
+    def split(self):
+        if self.running:
+            self.splits.append(self.elapsed())
+            if self.log is not None:
+                self.log.annotate('split', len(self.splits),
+                        '{:.3f}'.format(self.splits[-1] / 1e9))
+
+    def finishSolve(self, moves):
+        if self.running:
+            self.stopTimer()
+            if self.log is not None:
+                self.log.annotate('solve', '{:.3f}'.format(self.elapsed() / 1e9),
+                        moves)
+
     def displayTime(self):
-        text = str(self.time.elapsed()).zfill(7)[:-1]
-        formated = text[:-2] + '.' + text[-2:]
-        self.display(formated)
+        # Only hundredths are shown, skip repaints that would not change them
+        text = str(self.elapsed() // 10000000).zfill(6)
+        if text != self.shown:
+            self.shown = text
+            self.display(text[:-2] + '.' + text[-2:])
+
+    def showEvent(self, event):
+        super(DigitalClock, self).showEvent(event)
+        if self.running:
+            self.timer.start(self._frameInterval())
+        self.displayTime()
+
+    def hideEvent(self, event):
+        super(DigitalClock, self).hideEvent(event)
+        self.timer.stop()
+
+    def _frameInterval(self):
+        handle = self.window().windowHandle()
+        screen = handle.screen() if handle else QGuiApplication.primaryScreen()
+        rate = screen.refreshRate() if screen else 60
+        return max(1, int(1000 / rate))
 
 class SetSizeWindow(QDialog):
     sendSize = Signal(int)
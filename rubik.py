@@ -1,5 +1,8 @@
 import numpy as np
 import random as rnd
+from functools import lru_cache
+
+from rubikmoves import optimize
 
 class Cubie:
     def __init__(self):
@@ -16,7 +19,8 @@ class Cubie:
     def getZ(self):
         return self.z
 
-    def rotate(self, axis, rotation):
+    @staticmethod
+    def rotationMatrix(axis, rotation):
         rmatrix = np.identity(3)
         ch = [[0,-1],[ 1,0]] if (rotation + axis) % 2 == 0 else [[0, 1],[-1,0]]
         for i in range(2):
@@ -28,9 +32,10 @@ class Cubie:
                 if j >= axis:
                     jinc += 1
                 rmatrix[iinc,jinc] = ch[i][j]
-        self.x = np.matmul(rmatrix, self.x)
-        self.y = np.matmul(rmatrix, self.y)
-        self.z = np.matmul(rmatrix, self.z)
+        return rmatrix
+
+    def rotate(self, axis, rotation):
+        self.multiplyMatrix(self.rotationMatrix(axis, rotation))
 
     def multiplyMatrix(self, matrix):
         self.x = np.matmul(matrix, self.x)
@@ -46,29 +51,255 @@ class Cubie:
         n[:3,:3] = f
         return n.flatten()
 
+    def getIndex(self):
+        return ROTATIONINDEX[np.rint(self.getMatrix()).astype(np.int8).tobytes()]
+
+    @classmethod
+    def fromIndex(cls, index):
+        cubie = cls()
+        matrix = ROTATIONS[index]
+        cubie.x, cubie.y, cubie.z = matrix[:,0], matrix[:,1], matrix[:,2]
+        return cubie
+
     def __repr__(self):
         return "{}{}{}".format(self.x, self.y, self.z)
 
+def _generateRotations():
+    # Every orientation a cubie can reach, indexed in discovery order so the
+    # identity is always 0. Cubies are stored as indices into this table.
+    rotations = [np.identity(3, dtype=np.int8)]
+    index = {rotations[0].tobytes(): 0}
+    generators = [[np.rint(Cubie.rotationMatrix(axis, rotation)).astype(np.int8)
+            for rotation in range(2)] for axis in range(3)]
+    i = 0
+    while i < len(rotations):
+        for axis in range(3):
+            for rotation in range(2):
+                m = np.matmul(generators[axis][rotation], rotations[i])
+                if m.tobytes() not in index:
+                    index[m.tobytes()] = len(rotations)
+                    rotations.append(m)
+        i += 1
+
+    # rotate[axis, rotation, i] is the index of rotation i after a quarter turn
+    rotate = np.zeros((3, 2, len(rotations)), dtype=np.uint8)
+    for axis in range(3):
+        for rotation in range(2):
+            for i, m in enumerate(rotations):
+                m = np.matmul(generators[axis][rotation], m)
+                rotate[axis, rotation, i] = index[m.tobytes()]
+    return np.array(rotations), index, rotate
+
+ROTATIONS, ROTATIONINDEX, ROTATE = _generateRotations()
+
+def _generateSymmetries():
+    # The 24 whole-cube rotations followed by the same rotations applied to
+    # the cube mirrored across the x axis. A symmetry S moves the cubie at c
+    # to S c, a rotation turns its orientation R into S R and a mirror M into
+    # S M R M, keeping it a proper rotation. On the index array S is just a
+    # transpose plus flips, stored as such.
+    mirror = np.diag(np.array([-1,1,1], dtype=np.int8))
+    axes, flips, maps = [], [], []
+    for mirrored in (False, True):
+        for rotation in ROTATIONS:
+            matrix = np.matmul(rotation, mirror) if mirrored else rotation
+            b, a = np.nonzero(matrix)
+            order = np.zeros(3, dtype=int)
+            order[b] = a
+            axes.append(order)
+            flips.append(matrix[b, a] < 0)
+            maps.append([ROTATIONINDEX[(np.matmul(matrix, np.matmul(r, mirror))
+                if mirrored else np.matmul(matrix, r)).tobytes()] for r in ROTATIONS])
+    return np.array(axes), np.array(flips), np.array(maps, dtype=np.uint8)
+
+SYMMETRYAXES, SYMMETRYFLIPS, SYMMETRYMAP = _generateSymmetries()
+
+# Zobrist keys are derived on the fly with splitmix64 from the (position,
+# orientation) pair instead of being stored, a 100x100 table would take 192MB.
+# The frame orientation uses the position one past the last cubie.
+ZOBRISTSEED = np.uint64(0x9e3779b97f4a7c15)
+
+def zobristKeys(positions, indices):
+    # Arrays only, numpy warns about the wrapping multiplies on scalars
+    x = (np.atleast_1d(np.asarray(positions, dtype=np.uint64)) *
+            np.uint64(len(ROTATIONS)) + np.asarray(indices, dtype=np.uint64) +
+            ZOBRISTSEED)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+# Below this many keys they are computed once per size and looked up
+ZOBRISTTABLESIZE = 1 << 20
+
+@lru_cache(maxsize=8)
+def zobristTable(size):
+    if (size**3 + 1) * len(ROTATIONS) > ZOBRISTTABLESIZE:
+        return None
+    table = zobristKeys(np.arange(size**3 + 1)[:,None], np.arange(len(ROTATIONS)))
+    table.flags.writeable = False
+    return table
+
+def zobristHash(positions, indices, size=None):
+    table = zobristTable(size) if size else None
+    if table is None:
+        keys = zobristKeys(positions, indices)
+    else:
+        keys = table[positions, indices]
+    return int(np.bitwise_xor.reduce(keys, axis=None))
+
+@lru_cache(maxsize=None)
+def threadPool(threads):
+    # Imported here to keep it out of the start-up of headless tools
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(threads)
+
+@lru_cache(maxsize=8)
+def positionGrid(size):
+    grid = np.arange(size**3, dtype=np.uint32).reshape((size,size,size))
+    grid.flags.writeable = False
+    return grid
+
+# Binary state format, shared by single snapshots and batches of states:
+#   header: magic, version, flags, size, count (little endian)
+#   count records of: frame orientation index (u1), cubie orientation indices
+#   (u1), either the full size**3 cube or only its shell in C order.
+STATEMAGIC = b'RBKS'
+STATEVERSION = 1
+STATESHELL = 0x1
+STATEHEADER = np.dtype([('magic', 'S4'), ('version', '<u2'), ('flags', '<u2'),
+        ('size', '<u4'), ('count', '<u8')])
+
+def shellMask(size):
+    mask = np.ones((size,size,size), dtype=bool)
+    mask[1:-1,1:-1,1:-1] = False
+    return mask
+
+def stateDtype(size, shell=False):
+    cubies = (int(shellMask(size).sum()),) if shell else (size,size,size)
+    return np.dtype([('orientation', 'u1'), ('cubies', 'u1', cubies)])
+
+def stateHeader(size, shell=False, count=1):
+    header = np.zeros(1, dtype=STATEHEADER)
+    header['magic'] = STATEMAGIC
+    header['version'] = STATEVERSION
+    header['flags'] = STATESHELL if shell else 0
+    header['size'] = size
+    header['count'] = count
+    return header
+
+class StateWriter:
+    # Appends states to a state file as they come, the header count is
+    # patched in on close
+    def __init__(self, path, shell=False):
+        self.file = open(path, 'wb')
+        self.shell = shell
+        self.header = stateHeader(0, shell, 0)
+        self.file.write(self.header.tobytes())
+        self.count = 0
+
+    def _checkSize(self, size):
+        if self.count == 0:
+            self.header['size'] = size
+            self.dtype = stateDtype(size, self.shell)
+        elif size != self.header['size'][0]:
+            raise ValueError("All states in a file must have the same size")
+
+    def write(self, rubik):
+        self._checkSize(rubik.size)
+        self.file.write(rubik.toRecord(self.dtype, self.shell).tobytes())
+        self.count += 1
+
+    def writeBuffer(self, buffer):
+        # States from Rubik.toBuffer, copied byte for byte when stored the
+        # same way as this file instead of going through a Rubik
+        size, shell, records = statesFromBuffer(buffer)
+        if shell != self.shell:
+            for record in records:
+                self.write(Rubik.fromRecord(size, record, shell))
+            return
+        if len(records) == 0: return
+        self._checkSize(size)
+        self.file.write(memoryview(buffer)[STATEHEADER.itemsize:][:records.nbytes])
+        self.count += len(records)
+
+    def close(self):
+        self.header['count'] = self.count
+        self.file.seek(0)
+        self.file.write(self.header.tobytes())
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def saveStates(path, rubiks, shell=False):
+    with StateWriter(path, shell) as writer:
+        for rubik in rubiks:
+            writer.write(rubik)
+
+def _parseHeader(header):
+    # Takes the header as an array, empty when the input is too short
+    if len(header) == 0 or header[0]['magic'] != STATEMAGIC:
+        raise ValueError("Not a Rubik state file")
+    header = header[0]
+    if header['version'] > STATEVERSION:
+        raise ValueError("Unsupported state version {}".format(header['version']))
+    return int(header['size']), bool(header['flags'] & STATESHELL), int(header['count'])
+
+def loadStates(path):
+    # Map the records copy-on-write: nothing is read until it is touched and
+    # cubes taken from them can be moved without modifying the file.
+    size, shell, count = _parseHeader(np.fromfile(path, dtype=STATEHEADER, count=1))
+    dtype = stateDtype(size, shell)
+    if count == 0:
+        return size, shell, np.zeros(0, dtype=dtype)
+    records = np.memmap(path, dtype=dtype, mode='c', offset=STATEHEADER.itemsize,
+            shape=(count,))
+    return size, shell, records
+
+def statesFromBuffer(buffer):
+    count = 1 if len(buffer) >= STATEHEADER.itemsize else 0
+    size, shell, count = _parseHeader(np.frombuffer(buffer, dtype=STATEHEADER, count=count))
+    records = np.frombuffer(buffer, dtype=stateDtype(size, shell), count=count,
+            offset=STATEHEADER.itemsize)
+    return size, shell, records
+
+def _record(records, index):
+    if not -len(records) <= index < len(records):
+        raise ValueError("No state {} in {} states".format(index, len(records)))
+    return records[index]
+
 class Rubik:
     vmapping = {'up': np.array([0,1,0]), 'down': np.array([0,-1,0]),
             'right': np.array([1,0,0]), 'left': np.array([-1,0,0]),
             'front': np.array([0,0,1]), 'back': np.array([0,0,-1])}
     HISTORYSIZE = 20
-    def __init__(self, size):
+    PARALLELSIZE = 50
+    def __init__(self, size, threads=0, cube=None, orientation=0):
+        # A given cube is used as it is, hashed once with the orientation
         self.size = size
-        self.orientation = Cubie()
-        self.cube = np.array([[[Cubie() for i in range(size)]
-                for j in range(size)] for k in range(size)])
+        self.threads = threads
+        self.orientation = Cubie.fromIndex(orientation)
+        self.cube = np.zeros((size,size,size), dtype=np.uint8) if cube is None else cube
+        self.rehash()
 
         self.moves = 0
         self.hidx = 0
         self.history = []
 
+        # Called with ('move', axis, layers, rotation, register), ('undo',),
+        # ('redo',), ('rotate', axis, rotation) or ('reset',) after the
+        # change, scrambles and setCube only report a reset
+        self.listeners = []
+
+    def _notify(self, *event):
+        for listener in self.listeners:
+            listener(self, event)
+
     def move(self, axis, layers, rotation, register=True):
-        for i in range(self.size):
-            if layers[i]:
-                self._rotateSlice(axis, i, rotation)
-                self._rotateCubies(axis, i, rotation)
+        self._turn(axis, layers, rotation)
 
         if register:
             self.moves += 1
@@ -84,11 +315,32 @@ class Rubik:
                 self.hidx += 1
             self.history.append((axis, layers, rotation))
 
+        if self.listeners:
+            self._notify('move', axis, layers, rotation, register)
+
+    def _turn(self, axis, layers, rotation):
+        selected = np.flatnonzero(layers)
+        if self.threads > 1 and self.size >= self.PARALLELSIZE:
+            self._rotateParallel(axis, selected, rotation)
+        else:
+            for i in selected:
+                self._rotateSlice(axis, i, rotation)
+
+    def apply(self, moves, register=True, optimized=True):
+        # Run a move sequence, simplified first so that neither the cube nor
+        # the history see redundant moves
+        if optimized:
+            moves = optimize(moves)
+        for axis, layers, rotation in moves:
+            self.move(axis, layers, rotation, register)
+
     def rotateCube(self, axis, rotation):
         axes = [i for i in range(3) if i != axis]
         if (axis + rotation) % 2 == 1: axes.reverse()
-        self.cube = np.rot90(self.cube, axes=axes)
-        np.vectorize(lambda c: c.rotate(axis,rotation), [Cubie])(self.cube)
+        self.cube = ROTATE[axis, rotation][np.rot90(self.cube, axes=axes)]
+        self.rehash()
+        if self.listeners:
+            self._notify('rotate', axis, rotation)
 
     def rotateCubeRelativeToFace(self, face, rotation):
         axis, sign = self.getAxisSign(face, self.orientation)
@@ -96,88 +348,100 @@ class Rubik:
             rotation = 1 if rotation == 0 else 0
         self.rotateCube(axis, rotation)
 
+    def _layer(self, axis, layer):
+        index = [slice(None)] * 3
+        index[axis] = layer
+        return tuple(index)
+
     def _rotateSlice(self, axis, layer, rotation):
-        if (axis + rotation) % 2 == 0: axes = (0,1)
-        else: axes = (1,0)
-
-        if axis == 0:
-            self.cube[layer,:,:] = np.rot90(np.copy(self.cube[layer,:,:]),
-                    axes=axes)
-        elif axis == 1:
-            self.cube[:,layer,:] = np.rot90(np.copy(self.cube[:,layer,:]),
-                    axes=axes)
-        elif axis == 2:
-            self.cube[:,:,layer] = np.rot90(np.copy(self.cube[:,:,layer]),
-                    axes=axes)
-
-    def _rotateCubies(self, axis, layer, rotation):
-        function = np.vectorize(lambda c: c.rotate(axis,rotation), [Cubie])
-        if axis == 0:
-            function(self.cube[layer,:,:])
-        elif axis == 1:
-            function(self.cube[:,layer,:])
-        elif axis == 2:
-            function(self.cube[:,:,layer])
+        original = self.cube[self._layer(axis, layer)].copy()
+        self.zobrist ^= self._rotateRows(axis, layer, rotation, original,
+                slice(None))
+
+    def _rotateRows(self, axis, layer, rotation, original, rows):
+        # np.rot90 with axes (0,1) or (1,0), without its overhead
+        if (axis + rotation) % 2 == 0: rotated = original[:, ::-1].T
+        else: rotated = original.T[:, ::-1]
+
+        # Move the cubies within the slice and turn each of them, reading from
+        # a copy of the slice so that rows can be done separately. Returns
+        # the change of hash, which only depends on these rows.
+        index = self._layer(axis, layer)
+        positions = positionGrid(self.size)[index][rows]
+        turned = ROTATE[axis, rotation][rotated[rows]]
+        self.cube[index][rows] = turned
+        return (zobristHash(positions, original[rows], self.size) ^
+                zobristHash(positions, turned, self.size))
+
+    def _rotateParallel(self, axis, selected, rotation):
+        # Slices are independent and the numpy work releases the GIL, so
+        # they are spread over the threads. A move on fewer layers than
+        # threads also gets its slices split by rows.
+        chunks = min(self.size, -(-self.threads // max(len(selected), 1)))
+        bounds = np.linspace(0, self.size, chunks + 1).astype(int)
+        work = [(layer, self.cube[self._layer(axis, layer)].copy(), slice(a, b))
+                for layer in selected for a, b in zip(bounds[:-1], bounds[1:])]
+
+        def rotate(part):
+            change = 0
+            for layer, original, rows in part:
+                change ^= self._rotateRows(axis, layer, rotation, original, rows)
+            return change
+
+        parts = [work[i::self.threads] for i in range(self.threads)]
+        for change in threadPool(self.threads).map(rotate, parts):
+            self.zobrist ^= change
+
+    def setCube(self, cube):
+        # Every cubie replaced at once, listeners only see a reset
+        self.cube = cube
+        self.rehash()
+        if self.listeners:
+            self._notify('reset')
+
+    def rehash(self):
+        self.zobrist = (zobristHash(positionGrid(self.size), self.cube, self.size) ^
+                zobristHash(self.size**3, self.orientation.getIndex(), self.size))
+
+    def stateHash(self):
+        return self.zobrist
 
     def checkSolved(self):
-        reference = self.cube[0,0,0]
-        compareX = np.vectorize(lambda e: (e.getX()==reference.getX()).all(),
-                [Cubie])
-        compareY = np.vectorize(lambda e: (e.getY()==reference.getY()).all(),
-                [Cubie])
-        compareZ = np.vectorize(lambda e: (e.getZ()==reference.getZ()).all(),
-                [Cubie])
+        reference = ROTATIONS[self.cube[0,0,0]]
 
         # I will not explain the magnificence of this solution
-        functions = (compareX, compareY, compareZ)
-        _, laxis = np.where(reference.getMatrix().transpose())
-
-        # Axis 0
-        faces = np.concatenate((self.cube[0,:,:], self.cube[-1,:,:]))
-        if not functions[laxis[0]](faces).all(): return False
-
-        # Axis 1
-        faces = np.concatenate((self.cube[:,0,:], self.cube[:,-1,:]))
-        if not functions[laxis[1]](faces).all(): return False
+        _, laxis = np.where(reference.transpose())
 
-        # Axis 2
-        faces = np.concatenate((self.cube[:,:,0], self.cube[:,:,-1]))
-        if not functions[laxis[2]](faces).all(): return False
+        for axis in range(3):
+            faces = np.concatenate((self.cube[self._layer(axis, 0)],
+                self.cube[self._layer(axis, -1)]))
+            vectors = ROTATIONS[faces][..., laxis[axis]]
+            if not (vectors == reference[:, laxis[axis]]).all(): return False
 
         return True
 
     def checkCenterSolved(self):
         # Check only for unambiguous centers
         reference = self.cube[0,0,0]
-        compareAll = np.vectorize(lambda e:
-                (e.getX()==reference.getX()).all() and
-                (e.getY()==reference.getY()).all() and
-                (e.getZ()==reference.getZ()).all(), [Cubie])
 
         # Compare orientation on each face center
         xfaces = np.concatenate((self.cube[0,1:-1,1:-1],
             self.cube[self.size-1,1:-1,1:-1]))
-        if not compareAll(xfaces).all(): return False
+        if not (xfaces == reference).all(): return False
 
         yfaces = np.concatenate((self.cube[1:-1,0,1:-1],
             self.cube[1:-1,self.size-1,1:-1]))
-        if not compareAll(yfaces).all(): return False
+        if not (yfaces == reference).all(): return False
 
         zfaces = np.concatenate((self.cube[1:-1,1:-1,0],
             self.cube[1:-1,1:-1,self.size-1]))
-        if not compareAll(zfaces).all(): return False
+        if not (zfaces == reference).all(): return False
 
         return True
 
     def checkSuperSolved(self):
         # Include inner cubies
-        reference = self.cube[0,0,0]
-        compareAll = np.vectorize(lambda e:
-                (e.getX()==reference.getX()).all() and
-                (e.getY()==reference.getY()).all() and
-                (e.getZ()==reference.getZ()).all(), [Cubie])
-
-        return compareAll(self.cube).all()
+        return (self.cube == self.cube[0,0,0]).all()
 
     def moveRelativeToFace(self, face, layers, rotation):
         axis, sign = self.getAxisSign(face, self.orientation)
@@ -206,25 +470,28 @@ class Rubik:
     def getAxisSignFromFace(self, face):
         axis, sign = self.getAxisSign(face, self.orientation)
         lyridx = 0 if sign > 0 else self.size-1
-        if   axis == 0: layer = self.cube[lyridx,:,:]
-        elif axis == 1: layer = self.cube[:,lyridx,:]
-        elif axis == 2: layer = self.cube[:,:,lyridx]
-        asarr = np.vectorize(lambda c: self.getAxisSign(face,c),[Cubie])(layer)
-        return asarr.tolist()
+        layer = self.cube[self._layer(axis, lyridx)]
+        return [[self.getAxisSign(face, Cubie.fromIndex(c)) for c in row]
+                for row in layer]
 
     def getCubie(self, i, j, k):
-        return self.cube[i, j, k]
+        return Cubie.fromIndex(self.cube[i, j, k])
 
     def scramble(self, moves):
         self.hidx = 0
         self.history = []
+        scramble = []
         for _ in range(moves):
             axis = rnd.randrange(3)
             layers = []
             while not any(layers) or all(layers):
                 layers = [rnd.random() < 0.5 for _ in range(self.size)]
             rotation = rnd.randrange(2)
-            self.move(axis, layers, rotation, register=False)
+            self._turn(axis, layers, rotation)
+            scramble.append((axis, layers, rotation))
+        if self.listeners:
+            self._notify('reset')
+        return scramble
 
     def undo(self):
         if self.hidx > 0:
@@ -234,7 +501,9 @@ class Rubik:
             axis, layers, rotation = self.history[self.hidx]
 
             rotation = 1 if rotation == 0 else 0 # Invert
-            self.move(axis, layers, rotation, register=False)
+            self._turn(axis, layers, rotation)
+            if self.listeners:
+                self._notify('undo')
 
     def redo(self):
         if self.hidx < len(self.history):
@@ -243,11 +512,95 @@ class Rubik:
             axis, layers, rotation = self.history[self.hidx]
             self.hidx += 1 # Postincrement
 
-            self.move(axis, layers, rotation, register=False)
+            self._turn(axis, layers, rotation)
+            if self.listeners:
+                self._notify('redo')
+
+    def _symmetricCube(self, symmetry):
+        view = np.transpose(self.cube, SYMMETRYAXES[symmetry])
+        flipped = tuple(np.flatnonzero(SYMMETRYFLIPS[symmetry]))
+        if flipped:
+            view = np.flip(view, axis=flipped)
+        return SYMMETRYMAP[symmetry][view]
+
+    def _withCube(self, cube):
+        return Rubik(self.size, cube=cube, orientation=self.orientation.getIndex())
+
+    def symmetric(self, symmetry):
+        # Symmetries 0-23 are the whole-cube rotations, 24-47 their mirrors
+        return self._withCube(self._symmetricCube(symmetry))
+
+    def canonical(self, mirrors=False):
+        # Smallest symmetric cube in lexicographic order, found by comparing
+        # all candidates at once against the current best. Each round jumps
+        # to a strictly smaller candidate so only a few rounds are needed.
+        count = len(SYMMETRYMAP) if mirrors else len(ROTATIONS)
+        candidates = np.array([self._symmetricCube(s) for s in range(count)])
+        candidates = candidates.reshape((count, -1))
+        rows = np.arange(count)
+        best = 0
+        while True:
+            diff = candidates != candidates[best]
+            first = diff.argmax(axis=1)
+            values = candidates[rows, first]
+            smaller = diff.any(axis=1) & (values < candidates[best, first])
+            if not smaller.any(): break
+            order = np.lexsort((values[smaller], first[smaller]))
+            best = rows[smaller][order[0]]
+        return self._withCube(candidates[best].reshape(self.cube.shape).copy()), int(best)
+
+    def toRecord(self, dtype=None, shell=False):
+        record = np.zeros(1, dtype=dtype or stateDtype(self.size, shell))
+        record['orientation'] = self.orientation.getIndex()
+        record['cubies'] = self.cube[shellMask(self.size)] if shell else self.cube
+        return record
+
+    @classmethod
+    def fromRecord(cls, size, record, shell=False):
+        if shell:
+            # Inner cubies are not stored, they come back unturned
+            cube = np.zeros((size,size,size), dtype=np.uint8)
+            cube[shellMask(size)] = record['cubies']
+        else:
+            cube = record['cubies']
+        return cls(size, cube=cube, orientation=int(record['orientation']))
+
+    def toBuffer(self, shell=False):
+        return (stateHeader(self.size, shell).tobytes() +
+                self.toRecord(shell=shell).tobytes())
+
+    @classmethod
+    def fromBuffer(cls, buffer, index=0):
+        size, shell, records = statesFromBuffer(buffer)
+        rubik = cls.fromRecord(size, _record(records, index), shell)
+        if not rubik.cube.flags.writeable:
+            rubik.cube = rubik.cube.copy()
+        return rubik
+
+    def save(self, path, shell=False):
+        saveStates(path, [self], shell)
+
+    @classmethod
+    def load(cls, path, index=0):
+        size, shell, records = loadStates(path)
+        return cls.fromRecord(size, _record(records, index), shell)
+
+    def __eq__(self, other):
+        if not isinstance(other, Rubik): return NotImplemented
+        return (self.size == other.size and self.zobrist == other.zobrist and
+                self.orientation.getIndex() == other.orientation.getIndex() and
+                np.array_equal(self.cube, other.cube))
+
+    # Cubes change in place, sets and dicts take stateHash() instead
+    __hash__ = None
 
     def __str__(self):
         return str(self.cube)
 
 if __name__ == "__main__":
-    c = Rubik(3)
-    print(c.getAxisSignFromFace('right'))
+    # python -m rubik: share this module with the command-line front end
+    # instead of loading it a second time
+    import sys
+    sys.modules.setdefault('rubik', sys.modules['__main__'])
+    from rubikcli import main
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import numpy as np
+from math import gcd
+
+from rubik import Rubik, ROTATIONS, ROTATIONINDEX
+
+def _generateProducts():
+    # product[a, b] is the index of rotation a applied after rotation b
+    product = np.array([[ROTATIONINDEX[np.matmul(a, b).tobytes()]
+        for b in ROTATIONS] for a in ROTATIONS], dtype=np.uint8)
+    order = np.ones(len(ROTATIONS), dtype=int)
+    for i in range(len(ROTATIONS)):
+        power = i
+        while power != 0:
+            power = product[i, power]
+            order[i] += 1
+    return product, order
+
+PRODUCT, ORDER = _generateProducts()
+
+class Algorithm:
+    # A move sequence compiled into the permutation of cubie positions it
+    # performs plus the rotation it applies to each cubie. Moves are the
+    # (axis, layers, rotation) tuples taken by Rubik.move.
+    def __init__(self, size, moves):
+        self.size = size
+        self.moves = list(moves)
+
+        rubik = Rubik(size)
+        for axis, layers, rotation in self.moves:
+            rubik.move(axis, layers, rotation, register=False)
+
+        # Starting from the solved cube the orientation R of the cubie now
+        # at c is its whole twist, and it came from R^T c
+        shape = (size,size,size)
+        coords = 2 * np.indices(shape).reshape((3,-1)).transpose() - (size-1)
+        self.twist = rubik.cube.reshape(-1).copy()
+        origin = np.einsum('nji,nj->ni', ROTATIONS[self.twist], coords)
+        origin = (origin.transpose() + size-1) // 2
+        self.source = np.ravel_multi_index(tuple(origin), shape)
+        self.target = np.empty_like(self.source)
+        self.target[self.source] = np.arange(len(self.source))
+
+        # Only cubies that move or turn are part of a cycle worth following
+        self.active = np.flatnonzero((self.target != np.arange(len(self.target))) |
+                (self.twist != 0))
+        self.period = np.ones(len(self.source), dtype=np.int64)
+        self.cycleList = self._findCycles()
+
+    def apply(self, rubik, times=1):
+        cube = rubik.cube.reshape(-1)
+        for _ in range(times):
+            cube = PRODUCT[self.twist, cube[self.source]]
+        rubik.setCube(cube.reshape(rubik.cube.shape))
+
+    def _findCycles(self):
+        # Follow every cubie until it is back where it started, accumulating
+        # the rotations it goes through. A cycle of length L whose net
+        # rotation has order k takes L*k repetitions to be restored, its
+        # period. Plain lists are much faster than numpy scalars here.
+        target = self.target.tolist()
+        twists = self.twist.tolist()
+        product = PRODUCT.tolist()
+        visited = bytearray(len(target))
+        cycles = []
+        for start in self.active.tolist():
+            if visited[start]: continue
+            positions = []
+            twist = 0
+            position = start
+            while not visited[position]:
+                visited[position] = 1
+                positions.append(position)
+                position = target[position]
+                twist = product[twists[position]][twist]
+            period = len(positions) * int(ORDER[twist])
+            self.period[positions] = period
+            cycles.append((positions, twist, period))
+        return cycles
+
+    def _cubies(self, positions):
+        shape = (self.size,) * 3
+        return list(zip(*(p.tolist() for p in np.unravel_index(positions, shape))))
+
+    def cycles(self, trivial=False):
+        # (cubies, net twist, period) of each cycle, by first cubie
+        cycles = [(self._cubies(positions), twist, period)
+                for positions, twist, period in self.cycleList]
+        if trivial:
+            fixed = np.setdiff1d(np.arange(len(self.source)), self.active)
+            cycles += [([cubie], 0, 1) for cubie in self._cubies(fixed)]
+            cycles.sort(key=lambda cycle: cycle[0][0])
+        return cycles
+
+    def _power(self, times):
+        # The cube after repeating the algorithm on a solved one, by
+        # squaring. A cycle is back after its period, so each only needs
+        # the repetitions modulo its period.
+        active = self.active
+        index = np.zeros(len(self.source), dtype=np.intp)
+        index[active] = np.arange(len(active))
+        source = index[self.source[active]]
+        twist = self.twist[active]
+        periods, inverse = np.unique(self.period[active], return_inverse=True)
+        exponents = np.array([times % int(period) for period in periods],
+                dtype=np.int64)[inverse]
+
+        resultSource = np.arange(len(active))
+        resultTwist = np.zeros(len(active), dtype=np.uint8)
+        while exponents.any():
+            selected = exponents & 1 == 1
+            previous = resultSource[selected]
+            resultTwist[selected] = PRODUCT[resultTwist[selected], twist[previous]]
+            resultSource[selected] = source[previous]
+            twist = PRODUCT[twist, twist[source]]
+            source = source[source]
+            exponents >>= 1
+
+        cube = np.zeros(len(self.source), dtype=np.uint8)
+        cube[active] = resultTwist
+        return cube.reshape((self.size,) * 3)
+
+    def _order(self, check):
+        # Repetitions solving the cube are the multiples of the smallest
+        # one, as a solved cube turned as a whole is still solved. Starting
+        # from the repetitions restoring every cubie, prime factors are
+        # dropped for as long as the result stays solved.
+        order = 1
+        primes = set()
+        for _, _, period in self.cycleList:
+            order = order * period // gcd(order, period)
+            factor = 2
+            while factor * factor <= period:
+                while period % factor == 0:
+                    primes.add(factor)
+                    period //= factor
+                factor += 1
+            if period > 1: primes.add(period)
+
+        # The checks only read the cube, its hash is left as it is
+        probe = Rubik(self.size)
+        for prime in sorted(primes):
+            while order % prime == 0:
+                probe.cube = self._power(order // prime)
+                if not check(probe): break
+                order //= prime
+        return order
+
+    def order(self):
+        # Repetitions until every face shows one color again, as
+        # Rubik.checkSolved, whatever the orientation of the whole cube
+        return self._order(Rubik.checkSolved)
+
+    def superOrder(self):
+        # Repetitions until every cubie, inner ones included, is back in
+        # place up to a turn of the whole cube, as Rubik.checkSuperSolved
+        return self._order(Rubik.checkSuperSolved)
+
+    def touched(self):
+        return self._cubies(self.active)
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import argparse
+import random as rnd
+import numpy as np
+from multiprocessing import Pool
+
+from rubik import Rubik, StateWriter
+from rubikcli import replay
+from rubikmoves import parseAnnotation
+
+# One row per trial, written column by column to <output>/<name>.bin and
+# described in <output>/columns.json, readable with np.fromfile or np.memmap.
+# Rows come in completion order, final states are saved in the same order.
+COLUMNS = [('trial', '<u8'), ('seed', '<u8'), ('moves', '<u4'),
+        ('solved', 'u1'), ('centerSolved', 'u1'), ('superSolved', 'u1'),
+        ('hash', '<u8'), ('seconds', '<f8')]
+
+def trialSeed(seed, trial):
+    return int(np.random.SeedSequence([seed, trial]).generate_state(1, np.uint64)[0])
+
+def runTrial(task):
+    # Runs in a worker, the state goes back as its compact buffer form
+    trial, seed, size, scramble, session, keepState = task
+    start = time.perf_counter()
+    rnd.seed(seed)
+    rubik = Rubik(size)
+    rubik.scramble(scramble)
+    moves = scramble
+    if session:
+        # Resets in the session start over from a solved cube, a leading
+        # one as in game logs discards the scramble
+        rubik, count = replay(rubik, session)
+        moves += count
+    row = (trial, seed, moves, rubik.checkSolved(),
+            rubik.checkCenterSolved(), rubik.checkSuperSolved(), rubik.stateHash(),
+            time.perf_counter() - start)
+    return row, rubik.toBuffer() if keepState else None
+
+class ColumnWriter:
+    def __init__(self, path, columns, flush=4096):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.columns = columns
+        self.files = [open(os.path.join(path, name + '.bin'), 'wb')
+                for name, _ in columns]
+        self.rows = []
+        self.count = 0
+        self.flushSize = flush
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.flushSize:
+            self.flush()
+
+    def flush(self):
+        if not self.rows: return
+        for i, ((_, dtype), f) in enumerate(zip(self.columns, self.files)):
+            f.write(np.array([row[i] for row in self.rows], dtype=dtype).tobytes())
+            f.flush()
+        self.count += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        for f in self.files:
+            f.close()
+        schema = {'rows': self.count,
+                'columns': [{'name': name, 'dtype': dtype} for name, dtype in self.columns]}
+        with open(os.path.join(self.path, 'columns.json'), 'w') as f:
+            json.dump(schema, f, indent=2)
+
+def readColumns(path):
+    with open(os.path.join(path, 'columns.json')) as f:
+        schema = json.load(f)
+    return {c['name']: np.fromfile(os.path.join(path, c['name'] + '.bin'),
+        dtype=c['dtype'], count=schema['rows']) for c in schema['columns']}
+
+def run(size, trials, scramble=0, sessions=None, seed=0, workers=None,
+        output='results', states=None, chunksize=None):
+    # A reset starts over from a solved cube of its size, which has to be
+    # the size of the trials
+    for i, session in enumerate(sessions or ()):
+        for line in session:
+            if not line.startswith('#'): continue
+            kind, fields = parseAnnotation(line)
+            if kind == 'reset' and fields != [str(size)]:
+                raise ValueError("Replay {} has '{}' in trials of size {}".format(
+                    i + 1, line, size))
+
+    workers = workers or os.cpu_count()
+    chunksize = chunksize or max(1, min(256, trials // (workers * 8)))
+    tasks = ((trial, trialSeed(seed, trial), size, scramble,
+        sessions[trial % len(sessions)] if sessions else None,
+        states is not None) for trial in range(trials))
+
+    columns = ColumnWriter(output, COLUMNS)
+    writer = StateWriter(states) if states else None
+    solved = moves = 0
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        for row, state in pool.imap_unordered(runTrial, tasks, chunksize):
+            columns.write(row)
+            if writer:
+                writer.writeBuffer(state)
+            moves += row[2]
+            solved += row[3]
+    elapsed = time.perf_counter() - start
+    columns.close()
+    if writer:
+        writer.close()
+
+    print("{} trials of size {} on {} workers in {:.2f}s".format(trials, size,
+        workers, elapsed))
+    print("{:.1f} trials/s, {:.1f} moves/s, {:.2%} solved".format(trials / elapsed,
+        moves / elapsed, solved / trials if trials else 0))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded scramble/solve trials")
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--trials', type=int, default=1000)
+    parser.add_argument('--scramble', type=int, default=0,
+            help="random moves applied before the algorithm")
+    parser.add_argument('--replay', action='append', help="move log run after "
+            "the scramble as one session, trials cycle through the logs given; "
+            "a reset in the log, such as the one starting game logs, discards "
+            "the scramble and must be to --size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, help="defaults to one per core")
+    parser.add_argument('--output', default='results', help="column directory")
+    parser.add_argument('--states', help="also save the final states here")
+    args = parser.parse_args(argv)
+
+    try:
+        sessions = None
+        if args.replay:
+            sessions = []
+            for path in args.replay:
+                with open(path) as f:
+                    sessions.append(tuple(line.strip() for line in f if line.strip()))
+        run(args.size, args.trials, args.scramble, sessions, args.seed,
+                args.workers, args.output, args.states)
+    except (ValueError, OSError) as e:
+        sys.exit("rubikbatch: {}".format(e))
+
+if __name__ == "__main__":
+    sys.exit(main())
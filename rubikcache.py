@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+class LRUCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+class TranspositionTable(LRUCache):
+    # Keyed by Rubik.stateHash(), which move and rotateCube keep up to date
+    # incrementally, so every operation here is O(1) per state.
+    def __init__(self, capacity=1 << 20):
+        super(TranspositionTable, self).__init__(capacity)
+
+    def lookup(self, rubik, default=None):
+        return self.get(rubik.stateHash(), default)
+
+    def store(self, rubik, value=True):
+        self.put(rubik.stateHash(), value)
+
+    def seen(self, rubik):
+        # Record the state and tell whether it had been stored before
+        key = rubik.stateHash()
+        if key in self.entries:
+            self.get(key)
+            return True
+        self.put(key, True)
+        return False
@@ -0,0 +1,230 @@
+import sys
+import argparse
+import itertools
+import random as rnd
+
+from rubik import Rubik, STATEMAGIC, loadStates, saveStates
+from rubikmoves import formatRaw, parseRaw, isRaw, parseAnnotation
+from rubiknotation import compileAlgorithm, notate
+
+# Headless front end, run as python -m rubik. Nothing here imports Qt or
+# OpenGL, the window is only loaded by the gui command.
+
+CHUNK = 1024
+
+def readMoves(lines, size, orientation=0):
+    # Moves from a move log, one algorithm or raw move per line, lines
+    # starting with # are annotations (see replay for resets)
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if isRaw(line):
+            move = parseRaw(line)
+            if len(move[1]) != size:
+                raise ValueError("Raw move '{}' is not for size {}".format(line, size))
+            yield move
+        else:
+            yield from compileAlgorithm(line, size, orientation)
+
+def replay(rubik, lines, optimized=False):
+    # Run a move log on the cube in chunks. Each "# reset N" line starts over
+    # from a solved cube of size N, as the game does. Returns the cube in use
+    # at the end and the number of moves run.
+    count = 0
+    chunk = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('#'):
+            kind, fields = parseAnnotation(line)
+            if kind == 'reset':
+                if len(fields) != 1 or not fields[0].isdigit() or int(fields[0]) < 1:
+                    raise ValueError("Invalid reset '{}'".format(line))
+                rubik.apply(chunk, register=False, optimized=optimized)
+                count += len(chunk)
+                chunk = []
+                rubik = Rubik(int(fields[0]))
+            continue
+        chunk.extend(readMoves([line], rubik.size, rubik.orientation.getIndex()))
+        if len(chunk) >= CHUNK:
+            rubik.apply(chunk, register=False, optimized=optimized)
+            count += len(chunk)
+            chunk = []
+    rubik.apply(chunk, register=False, optimized=optimized)
+    return rubik, count + len(chunk)
+
+def rawSize(lines):
+    # Size of the first move when it is raw, None otherwise. The lines read
+    # are handed back in front of the rest.
+    lines = iter(lines)
+    read = []
+    for line in lines:
+        read.append(line)
+        line = line.strip()
+        if line and not line.startswith('#'):
+            size = len(parseRaw(line)[1]) if isRaw(line) else None
+            return size, itertools.chain(read, lines)
+    return None, read
+
+def openState(args, size=None):
+    if args.state:
+        return Rubik.load(args.state, args.index)
+    return Rubik(args.size or size or 3)
+
+def scramble(args):
+    if args.seed is not None:
+        rnd.seed(args.seed)
+    rubik = Rubik(args.size)
+    moves = rubik.scramble(args.moves)
+    for move in moves:
+        print(notate(move) if args.format == 'notation' else formatRaw(move))
+    if args.output:
+        rubik.save(args.output, args.shell)
+
+def apply(args):
+    lines = sys.stdin
+    size = None
+    if not args.state and not args.size:
+        # Raw moves tell their size, as in convert
+        size, lines = rawSize(lines)
+    rubik, count = replay(openState(args, size), lines, args.optimize)
+
+    if args.output:
+        rubik.save(args.output, args.shell)
+    print("{} moves, {}".format(count, "solved" if rubik.checkSolved() else
+        "not solved"), file=sys.stderr)
+
+def verify(args):
+    rubik = openState(args)
+    check = {'solved': rubik.checkSolved, 'center': rubik.checkCenterSolved,
+            'super': rubik.checkSuperSolved}[args.level]
+    solved = check()
+    print("solved" if solved else "not solved")
+    return 0 if solved else 1
+
+def convert(args):
+    with open(args.input, 'rb') as f:
+        magic = f.read(len(STATEMAGIC))
+
+    if magic == STATEMAGIC:
+        size, shell, records = loadStates(args.input)
+        saveStates(args.output, (Rubik.fromRecord(size, record, shell)
+            for record in records), shell if args.shell is None else args.shell)
+        return
+
+    # Move logs, annotations are kept as they are
+    with open(args.input) as f, open(args.output, 'w') as out:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                out.write(line + '\n')
+                continue
+            size = len(parseRaw(line)[1]) if isRaw(line) else args.size
+            if not size:
+                sys.exit("convert: --size is needed to read notation")
+            moves = readMoves([line], size)
+            if args.to == 'raw':
+                out.writelines(formatRaw(move) + '\n' for move in moves)
+            else:
+                out.write(' '.join(notate(move) for move in moves) + '\n')
+
+def gui(args):
+    # The only place where Qt and OpenGL get imported
+    from PySide2.QtWidgets import QApplication
+    from main import MainWindow
+
+    app = QApplication([])
+    mainwindow = MainWindow()
+    if args.serve:
+        from rubikstream import SpectatorServer
+        view = mainwindow.cube
+        server = SpectatorServer(view.cube, args.serve).startThread()
+        view.cubeReset.connect(lambda: server.attach(view.cube))
+        print("Serving on {}".format(server.path or "{}:{}".format(server.host,
+            server.port)), file=sys.stderr)
+    mainwindow.show()
+    return app.exec_()
+
+def watch(args):
+    import asyncio
+    from rubikstream import SpectatorClient
+
+    def show(rubik, event):
+        if event[0] == 'move':
+            text = notate(event[1:4])
+        elif event[0] == 'rotate':
+            text = notate((event[1], [True] * rubik.size, event[2]))
+        else:
+            text = event[0]
+        print("{:<12} {:>5} {}".format(text, rubik.moves,
+            "solved" if rubik.checkSolved() else ""), flush=True)
+
+    try:
+        asyncio.run(SpectatorClient(args.address, show).run())
+    except KeyboardInterrupt:
+        pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m rubik',
+            description="Headless Rubik's cube engine")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def stateArguments(command):
+        command.add_argument('--size', type=int,
+                help="defaults to 3, or to the size of raw moves for apply")
+        command.add_argument('--state', help="start from this state file")
+        command.add_argument('--index', type=int, default=0,
+                help="state to take from a file with many")
+
+    command = commands.add_parser('scramble', help="print a random scramble")
+    command.add_argument('--size', type=int, default=3)
+    command.add_argument('--moves', type=int, default=20)
+    command.add_argument('--seed', type=int)
+    command.add_argument('--format', choices=('notation', 'raw'), default='notation')
+    command.add_argument('-o', '--output', help="save the scrambled state")
+    command.add_argument('--shell', action='store_true', help="save the shell only")
+    command.set_defaults(run=scramble)
+
+    command = commands.add_parser('apply', help="apply moves read from stdin")
+    stateArguments(command)
+    command.add_argument('-o', '--output', help="save the resulting state")
+    command.add_argument('--shell', action='store_true', help="save the shell only")
+    command.add_argument('--optimize', action='store_true',
+            help="simplify raw moves first, notation is always simplified")
+    command.set_defaults(run=apply)
+
+    command = commands.add_parser('verify', help="exit with 0 if solved")
+    stateArguments(command)
+    command.add_argument('--level', choices=('solved', 'center', 'super'),
+            default='solved')
+    command.set_defaults(run=verify)
+
+    command = commands.add_parser('convert', help="convert a state file or move log")
+    command.add_argument('input')
+    command.add_argument('output')
+    command.add_argument('--shell', action='store_true', default=None,
+            help="state files: store the shell only")
+    command.add_argument('--full', dest='shell', action='store_false',
+            help="state files: store every cubie")
+    command.add_argument('--to', choices=('notation', 'raw'), default='raw',
+            help="move logs: output format")
+    command.add_argument('--size', type=int, help="move logs: cube size")
+    command.set_defaults(run=convert)
+
+    command = commands.add_parser('gui', help="open the game window")
+    command.add_argument('--serve', metavar='ADDRESS',
+            help="stream the game to spectators, [host:]port or socket path")
+    command.set_defaults(run=gui)
+
+    command = commands.add_parser('watch', help="follow a game streamed by gui --serve")
+    command.add_argument('address', help="[host:]port or socket path")
+    command.set_defaults(run=watch)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.run(args)
+    except (ValueError, OSError) as e:
+        sys.exit("{}: {}".format(args.command, e))
+
+if __name__ == "__main__":
+    sys.exit(main())
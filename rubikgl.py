@@ -9,6 +9,7 @@ from PySide2.QtOpenGL  import *
 from OpenGL.GL  import *
 from OpenGL.GLU import gluPickMatrix, gluUnProject
 from rubik import Rubik
+from rubikmoves import MoveLog
 
 class RubikGL(QGLWidget):
     colors = {
@@ -55,6 +56,9 @@ class RubikGL(QGLWidget):
 
     fps = 60
 
+    cubeSolved = Signal()
+    cubeReset = Signal()
+
     def __init__(self,parent=None):
         super(RubikGL, self).__init__(parent)
 
@@ -72,15 +76,19 @@ class RubikGL(QGLWidget):
         self.picking = False
         self.shrink = 1
 
+        self.log = MoveLog()
+
     def initCube(self, size):
         self.size = size
         self.cube = Rubik(size)
+        self.log.annotate('reset', size)
 
         self.layers = [True] + [False] * (size-1)
         self.beginGame = False
 
         self.rotating = 0
         self.repaint()
+        self.cubeReset.emit()
 
     def initializeGL(self):
         self.object = self.makeObject()
@@ -212,6 +220,7 @@ class RubikGL(QGLWidget):
 
                     self.rotate()
                     self.cube.moveRelativeToFace(face, self.layers, rotDir)
+                    self.log.move(self.cube.history[self.cube.hidx-1])
 
                     self.repaint()
                     self.checkSolved()
@@ -262,6 +271,7 @@ class RubikGL(QGLWidget):
             d.setWindowTitle("Congratulations!")
             d.setText("You solved the cube using {} movements.".format(self.cube.moves))
             d.show()
+            self.cubeSolved.emit()
 
     def wheelEvent(self, event):
         if self.rotating == 0:
@@ -274,11 +284,17 @@ class RubikGL(QGLWidget):
         self.layers = layers
 
     def scramble(self):
-        self.cube.scramble(self.size**3)
+        moves = self.cube.scramble(self.size**3)
+        self.log.annotate('scramble')
+        for move in moves:
+            self.log.move(move)
         self.beginGame = True
         self.repaint()
 
     def undo(self):
+        if self.cube.hidx > 0:
+            axis, layers, rotation = self.cube.history[self.cube.hidx-1]
+            self.log.move((axis, layers, 1 if rotation == 0 else 0))
         self.cube.undo()
         self.repaint()
 
@@ -286,6 +302,8 @@ class RubikGL(QGLWidget):
         self.initCube(self.size)
 
     def redo(self):
+        if self.cube.hidx < len(self.cube.history):
+            self.log.move(self.cube.history[self.cube.hidx])
         self.cube.redo()
         self.repaint()
 
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Moves are the (axis, layers, rotation) tuples taken by Rubik.move, where a
+# rotation of 0 is a quarter turn and 1 is its inverse.
+
+def _emit(axis, turns):
+    # Fewest moves giving every layer its number of quarter turns (mod 4).
+    # Half turns share a move with the quarter turns going the same way.
+    once = turns == 1
+    twice = turns == 2
+    back = turns == 3
+    moves = []
+    if twice.any():
+        if once.any() or not back.any():
+            moves.append((axis, (once | twice).tolist(), 0))
+            moves.append((axis, twice.tolist(), 0))
+        else:
+            moves.append((axis, (back | twice).tolist(), 1))
+            moves.append((axis, twice.tolist(), 1))
+            back = np.zeros_like(back)
+        once = np.zeros_like(once)
+    if once.any(): moves.append((axis, once.tolist(), 0))
+    if back.any(): moves.append((axis, back.tolist(), 1))
+    return moves
+
+def optimize(moves):
+    # Turns of the same axis commute and a quarter turn has order 4, so a run
+    # of moves on one axis is fully described by the quarter turns of each
+    # layer mod 4. Runs are kept on a stack: a run that cancels out is
+    # dropped, which lets the runs around it merge in turn. The result has
+    # the same effect as the input and is the same for equivalent inputs
+    # differing only in the order of same-axis moves.
+    stack = []
+    for axis, layers, rotation in moves:
+        if not stack or stack[-1][0] != axis:
+            stack.append((axis, np.zeros(len(layers), dtype=np.int8)))
+        turns = stack[-1][1]
+        turns[np.asarray(layers, dtype=bool)] += 1 if rotation == 0 else 3
+        turns %= 4
+        if not turns.any():
+            stack.pop()
+
+    optimized = []
+    for axis, turns in stack:
+        optimized.extend(_emit(axis, turns))
+    return optimized
+
+# Raw move log lines spell out a move exactly as "axis rotation layers", the
+# layers as a string of 0 and 1 starting from layer 0
+def formatRaw(move):
+    axis, layers, rotation = move
+    return "{} {} {}".format(axis, rotation, ''.join('1' if l else '0' for l in layers))
+
+def parseRaw(line):
+    axis, rotation, layers = line.split()
+    if axis not in ('0','1','2') or rotation not in ('0','1') or set(layers) - set('01'):
+        raise ValueError("Invalid raw move '{}'".format(line))
+    return int(axis), [c == '1' for c in layers], int(rotation)
+
+def isRaw(line):
+    parts = line.split()
+    return len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit()
+
+def parseAnnotation(line):
+    # (kind, fields) of a "# kind fields..." line
+    parts = line.lstrip('#').split()
+    return (parts[0], parts[1:]) if parts else ('', [])
+
+class MoveLog:
+    # A move log being recorded: raw moves plus "# kind fields..." annotations
+    # such as solve times, readable by python -m rubik apply
+    def __init__(self, lines=None):
+        self.lines = lines or []
+
+    def move(self, move):
+        self.lines.append(formatRaw(move))
+
+    def annotate(self, kind, *fields):
+        self.lines.append(' '.join(['#', kind] + [str(f) for f in fields]))
+
+    def annotations(self, kind):
+        prefix = '# ' + kind
+        return [line.split()[2:] for line in self.lines
+                if line == prefix or line.startswith(prefix + ' ')]
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            f.writelines(line + '\n' for line in self.lines)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls([line.strip() for line in f if line.strip()])
@@ -0,0 +1,120 @@
+import re
+import numpy as np
+
+from rubik import Rubik, ROTATIONS
+from rubikcache import LRUCache
+from rubikmoves import optimize
+
+# Big cube notation, layers are counted from the turned face starting at 1:
+#   R U' F2       outer layer, clockwise seen from that face, inverse, half
+#   2R  3-4R      inner slice 2, inner slices 3 to 4
+#   Rw r  3Rw 3r  the 2 (or 3) outer layers together
+#   M E S         every inner layer, turning as L, D and F
+#   x y z         the whole cube, turning as R, U and F
+FACES = {'R': 'right', 'L': 'left', 'U': 'up', 'D': 'down', 'F': 'front',
+        'B': 'back', 'M': 'left', 'E': 'down', 'S': 'front', 'x': 'right',
+        'y': 'up', 'z': 'front'}
+
+NOTATIONFACES = (('R', 'L'), ('U', 'D'), ('F', 'B'))
+ROTATIONNAMES = ('x', 'y', 'z')
+
+TOKEN = re.compile(r"\s*(?:(\d+)(?:-(\d+))?)?([RLUDFBrludfbMESxyz])(w)?(\d)?(')?\s*")
+
+ALGORITHMCACHE = LRUCache(1024)
+
+def parse(text):
+    # Split an algorithm into (face, first layer, last layer, quarter turns)
+    # with layers counted from the face; None stands for the last layer
+    moves = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if not match:
+            raise ValueError("Invalid move at '{}'".format(text[position:]))
+        first, last, letter, wide, amount, prime = match.groups()
+        if letter in 'xyz':
+            if first or wide: raise ValueError("Invalid move '{}'".format(match.group().strip()))
+            span = (1, None)
+        elif letter in 'MES':
+            if first or wide: raise ValueError("Invalid move '{}'".format(match.group().strip()))
+            span = (2, -1)
+        elif letter.islower() or wide:
+            if last: span = (int(first), int(last))
+            else: span = (1, int(first) if first else 2)
+        else:
+            if last: span = (int(first), int(last))
+            else: span = (int(first or 1), int(first or 1))
+        turns = int(amount) if amount else 1
+        if prime: turns = -turns
+        moves.append((FACES[letter.upper() if letter in 'rludfb' else letter],
+            span[0], span[1], turns % 4))
+        position = match.end()
+    return moves
+
+def _axisSign(face, orientation):
+    v = np.matmul(ROTATIONS[orientation].transpose(), Rubik.vmapping[face])
+    axis = int(np.flatnonzero(v)[0])
+    return axis, int(v[axis])
+
+def compileAlgorithm(text, size, orientation=0):
+    # Moves for Rubik.move equivalent to the algorithm when the cube frame
+    # has the given orientation index. Results are cached and immutable.
+    key = (text, size, orientation)
+    moves = ALGORITHMCACHE.get(key)
+    if moves is not None:
+        return moves
+
+    compiled = []
+    for face, first, last, turns in parse(text):
+        if last is None: last = size
+        elif last < 0: last += size
+        if not 1 <= first <= last <= size:
+            raise ValueError("Layers {}-{} out of range for size {}".format(first, last, size))
+        axis, sign = _axisSign(face, orientation)
+        layers = [False] * size
+        layers[first-1:last] = [True] * (last - first + 1)
+        if sign < 0: layers.reverse()
+        # Rotation 1 is clockwise seen from the positive face
+        rotation = 1 if sign > 0 else 0
+        if turns == 3: rotation = 1 - rotation
+        compiled.extend([(axis, layers, rotation)] * (2 if turns == 2 else
+            0 if turns == 0 else 1))
+
+    moves = tuple((axis, tuple(layers), rotation)
+            for axis, layers, rotation in optimize(compiled))
+    ALGORITHMCACHE.put(key, moves)
+    return moves
+
+def notate(move):
+    # Notation for an (axis, layers, rotation) move of a cube whose frame is
+    # not turned, one token per run of consecutive layers, each counted from
+    # the nearest face
+    axis, layers, rotation = move
+    size = len(layers)
+    positive, negative = NOTATIONFACES[axis]
+    tokens = []
+    first = None
+    for i, layer in enumerate(list(layers) + [False]):
+        if layer and first is None:
+            first = i
+        elif not layer and first is not None:
+            last = i - 1
+            if first == 0 and last == size - 1:
+                token, clockwise = ROTATIONNAMES[axis], rotation == 1
+            else:
+                if first == 0 or (last != size - 1 and first <= size - 1 - last):
+                    face, a, b, clockwise = positive, first + 1, last + 1, rotation == 1
+                else:
+                    face, a, b, clockwise = negative, size - last, size - first, rotation == 0
+                if a == 1 and b == 1: token = face
+                elif a == 1: token = ("" if b == 2 else str(b)) + face + "w"
+                elif a == b: token = str(a) + face
+                else: token = "{}-{}{}".format(a, b, face)
+            tokens.append(token + ("" if clockwise else "'"))
+            first = None
+    return " ".join(tokens)
+
+def perform(rubik, text, register=True):
+    moves = compileAlgorithm(text, rubik.size, rubik.orientation.getIndex())
+    rubik.apply(moves, register, optimized=False)
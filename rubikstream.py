@@ -0,0 +1,282 @@
+import struct
+import asyncio
+import threading
+import numpy as np
+
+from rubik import Rubik
+
+# Stream of a live cube to spectators on the same machine. A client first
+# gets a snapshot, then only the changes, each a few bytes whatever the size:
+#   S  u32 length, then a state buffer (u32 length first), u32 moves,
+#      u16 history index, u16 history length and the history moves
+#   M  move, see encodeMove
+#   U  undo
+#   R  redo
+#   C  whole-cube rotation, one byte with the axis and the rotation
+SNAPSHOT, MOVE, UNDO, REDO, ROTATE = b'S', b'M', b'U', b'R', b'C'
+
+# Move flags: axis in bits 0-1, rotation in bit 2, registered in bit 3 and
+# whether the layers follow as a u16 (first, count) range instead of a bitmap
+RANGE = 0x10
+
+# Beyond this many bytes waiting for a client, its backlog is replaced by
+# a fresh snapshot
+MAXPENDING = 1 << 16
+
+# Seconds given to clients to take what is waiting for them when the server
+# closes, the connections of those that do not are aborted
+CLOSETIMEOUT = 1
+
+def encodeMove(axis, layers, rotation, register=True):
+    layers = np.asarray(layers, dtype=bool)
+    selected = np.flatnonzero(layers)
+    flags = axis | rotation << 2 | (0x8 if register else 0)
+    if len(selected) and selected[-1] - selected[0] + 1 == len(selected):
+        return struct.pack('<BHH', flags | RANGE, selected[0], len(selected))
+    return struct.pack('<B', flags) + np.packbits(layers).tobytes()
+
+def moveLength(flags, size):
+    return 4 if flags & RANGE else (size + 7) // 8
+
+def decodeMove(flags, data, size):
+    if flags & RANGE:
+        first, count = struct.unpack('<HH', data)
+        layers = [first <= i < first + count for i in range(size)]
+    else:
+        layers = np.unpackbits(np.frombuffer(data, dtype=np.uint8))[:size]
+        layers = [bool(l) for l in layers]
+    return flags & 0x3, layers, flags >> 2 & 0x1, bool(flags & 0x8)
+
+def encodeSnapshot(rubik):
+    state = rubik.toBuffer()
+    history = b''.join(encodeMove(*move) for move in rubik.history)
+    payload = (struct.pack('<I', len(state)) + state +
+            struct.pack('<IHH', rubik.moves, rubik.hidx, len(rubik.history)) + history)
+    return SNAPSHOT + struct.pack('<I', len(payload)) + payload
+
+def decodeSnapshot(payload):
+    length, = struct.unpack_from('<I', payload)
+    rubik = Rubik.fromBuffer(payload[4:4+length])
+    offset = 4 + length
+    rubik.moves, rubik.hidx, count = struct.unpack_from('<IHH', payload, offset)
+    offset += 8
+    for _ in range(count):
+        flags = payload[offset]
+        end = offset + 1 + moveLength(flags, rubik.size)
+        axis, layers, rotation, _ = decodeMove(flags, payload[offset+1:end], rubik.size)
+        rubik.history.append((axis, layers, rotation))
+        offset = end
+    return rubik
+
+def encodeEvent(event):
+    kind = event[0]
+    if kind == 'move': return MOVE + encodeMove(*event[1:])
+    if kind == 'undo': return UNDO
+    if kind == 'redo': return REDO
+    if kind == 'rotate': return ROTATE + bytes([event[1] | event[2] << 2])
+    raise ValueError("Unknown event {}".format(kind))
+
+def applyEvent(rubik, event):
+    kind = event[0]
+    if kind == 'move': rubik.move(*event[1:])
+    elif kind == 'undo': rubik.undo()
+    elif kind == 'redo': rubik.redo()
+    elif kind == 'rotate': rubik.rotateCube(*event[1:])
+
+def parseAddress(address):
+    # A path for a Unix domain socket, otherwise [host:]port on localhost
+    if '/' in address:
+        return None, None, address
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port), None
+
+class Spectator:
+    def __init__(self, writer):
+        self.writer = writer
+        self.task = asyncio.current_task()
+        self.pending = bytearray()
+        self.ready = asyncio.Event()
+        self.resync = False
+        self.closed = False
+
+class SpectatorServer:
+    # Streams a Rubik that lives in another thread (the GUI one) or in the
+    # same loop. Changes are reported by the cube's listeners and handed to
+    # the loop, which keeps a mirror of the cube to take snapshots from.
+    def __init__(self, rubik, address='127.0.0.1:0'):
+        self.host, self.port, self.path = parseAddress(address)
+        self.rubik = None
+        self.mirror = None
+        self.spectators = set()
+        self.server = None
+        self.loop = None
+        self.thread = None
+        self.attach(rubik)
+
+    def attach(self, rubik):
+        # Follow another cube, spectators get its snapshot
+        if self.rubik is not None:
+            self.rubik.listeners.remove(self._listen)
+        self.rubik = rubik
+        rubik.listeners.append(self._listen)
+        self._listen(rubik, ('reset',))
+
+    def _listen(self, rubik, event):
+        # Runs in the thread moving the cube. A reset can not be replayed,
+        # so the new state is taken here.
+        if event[0] == 'reset':
+            event = ('snapshot', encodeSnapshot(rubik))
+        if self.loop is None:
+            self._publish(event)
+        else:
+            self.loop.call_soon_threadsafe(self._publish, event)
+
+    def _publish(self, event):
+        if event[0] == 'snapshot':
+            self.mirror = decodeSnapshot(event[1][5:])
+            message = event[1]
+        else:
+            applyEvent(self.mirror, event)
+            message = encodeEvent(event)
+
+        for spectator in self.spectators:
+            self._send(spectator, message, event[0] == 'snapshot')
+
+    def _send(self, spectator, message, snapshot=False):
+        if snapshot:
+            spectator.pending = bytearray(message)
+            spectator.resync = False
+        elif spectator.resync or len(spectator.pending) + len(message) > MAXPENDING:
+            # Too far behind, whatever is waiting gets replaced by a snapshot
+            # when the client is able to take it
+            spectator.pending = bytearray()
+            spectator.resync = True
+        else:
+            spectator.pending += message
+        spectator.ready.set()
+
+    async def _serve(self, reader, writer):
+        spectator = Spectator(writer)
+        self.spectators.add(spectator)
+        self._send(spectator, encodeSnapshot(self.mirror), snapshot=True)
+        try:
+            while True:
+                await spectator.ready.wait()
+                spectator.ready.clear()
+                if spectator.closed:
+                    break
+                if spectator.resync:
+                    self._send(spectator, encodeSnapshot(self.mirror), snapshot=True)
+                    spectator.ready.clear()
+                # Everything waiting goes in one write, drain holds this
+                # client back while the others carry on
+                data = bytes(spectator.pending)
+                spectator.pending = bytearray()
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.spectators.discard(spectator)
+            writer.close()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        if self.path:
+            self.server = await asyncio.start_unix_server(self._serve, self.path)
+        else:
+            self.server = await asyncio.start_server(self._serve, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    def startThread(self):
+        # Serve from a loop of its own, for cubes driven by a Qt event loop
+        started = threading.Event()
+        loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+            loop.close()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait()
+        return self
+
+    async def _shutdown(self, server):
+        server.close()
+        tasks = [spectator.task for spectator in self.spectators]
+        for spectator in self.spectators:
+            spectator.closed = True
+            spectator.ready.set()
+        if tasks:
+            _, stuck = await asyncio.wait(tasks, timeout=CLOSETIMEOUT)
+            for spectator in self.spectators:
+                if spectator.task in stuck:
+                    spectator.writer.transport.abort()
+            if stuck:
+                await asyncio.wait(stuck)
+        await server.wait_closed()
+
+    def close(self):
+        # Stop listening and disconnect the spectators. The loop of
+        # startThread is stopped as well, waiting for it; in a loop of the
+        # caller's the shutdown is only scheduled.
+        if self.rubik is not None:
+            self.rubik.listeners.remove(self._listen)
+            self.rubik = None
+        if self.server is None:
+            return
+        shutdown = asyncio.run_coroutine_threadsafe(self._shutdown(self.server),
+                self.loop)
+        self.server = None
+        if self.thread is not None:
+            shutdown.result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.thread = None
+
+class SpectatorClient:
+    # Rebuilds the streamed cube with the engine, calling back with
+    # (rubik, event) after each change
+    def __init__(self, address, callback=None):
+        self.host, self.port, self.path = parseAddress(address)
+        self.callback = callback
+        self.rubik = None
+
+    async def run(self):
+        if self.path:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                try:
+                    kind = await reader.readexactly(1)
+                except asyncio.IncompleteReadError:
+                    return
+                if kind == SNAPSHOT:
+                    length, = struct.unpack('<I', await reader.readexactly(4))
+                    self.rubik = decodeSnapshot(await reader.readexactly(length))
+                    event = ('snapshot',)
+                elif kind == MOVE:
+                    flags = (await reader.readexactly(1))[0]
+                    data = await reader.readexactly(moveLength(flags, self.rubik.size))
+                    event = ('move',) + decodeMove(flags, data, self.rubik.size)
+                elif kind == UNDO:
+                    event = ('undo',)
+                elif kind == REDO:
+                    event = ('redo',)
+                elif kind == ROTATE:
+                    value = (await reader.readexactly(1))[0]
+                    event = ('rotate', value & 0x3, value >> 2 & 0x1)
+                else:
+                    raise ValueError("Unknown message {!r}".format(kind))
+                applyEvent(self.rubik, event)
+                if self.callback:
+                    self.callback(self.rubik, event)
+        finally:
+            writer.close()
@@ -111,7 +111,7 @@ class RubikView(QGraphicsView):
             for j in range(self.size):
                 for k in range(self.size):
                     for origin in self.faces:
-                        self.cubies[i][j][k][origin].setColor(self.rubik.getFace(origin, self.rubik.cube[i][j][k]))
+                        self.cubies[i][j][k][origin].setColor(self.rubik.getFace(origin, self.rubik.getCubie(i,j,k)))
 
     def mouseReleaseEvent(self, event):
         pos = self.mapToScene(event.pos())